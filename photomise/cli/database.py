@@ -18,10 +18,13 @@ def prettify(
         if project:
             pdb, _ = set_project(project)
 
+        # Files written by older versions may still be compact JSON
         if project:
             pdb.close()
+            pdb.make_json_readable()
         else:
             gdb.close()
+            gdb.make_json_readable()
 
     except Exception as e:
         logger.fatal(f"Error: {e}")
@@ -1,4 +1,3 @@
-import InquirerPy as inquirer
 import typer
 
 from photomise.database.shared import SharedDB
@@ -56,6 +55,7 @@ def edit(
         "sharpness": sharpness,
     }
     updated = gdb.upsert_filter(params)
+    gdb.flush()
 
     return updated
 
@@ -64,6 +64,8 @@ def edit(
 def delete(
     filter_name: str = typer.Argument(None, help="Filter name"),
 ):
+    from InquirerPy import inquirer
+
     try:
         gdb = SharedDB()
     except Exception as e:
@@ -75,6 +77,7 @@ def delete(
             choices=[filter["name"] for filter in gdb.get_filters_all()],
         ).execute()
     gdb.delete_filter(filter_name)
+    gdb.flush()
     return
 
 
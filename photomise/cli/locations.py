@@ -1,4 +1,3 @@
-import InquirerPy as inquirer
 from typer import Argument, Option, Typer
 
 from photomise.database.shared import SharedDB
@@ -17,6 +16,8 @@ def edit(
     list: bool = Option(False, "--list", "-l", help="List all locations"),
 ):
     """Edit location settings."""
+    from InquirerPy import inquirer
+
     try:
         gdb = SharedDB()
     except Exception as e:
@@ -48,4 +49,5 @@ def edit(
         updated_fields[field_name] = float(value)
 
     updated = gdb.upsert_location(updated_fields)
+    gdb.flush()
     return updated
@@ -56,13 +56,14 @@ def init(
     project_path = fix_dir(project_path)
     if not os.path.exists(project_path):
         os.makedirs(project_path)
-    if not os.path.exists(f"{project_path}/db"):
-        os.makedirs(f"{project_path}/db")
-    if not os.path.exists(f"{project_path}/assets"):
-        os.makedirs(f"{project_path}/assets")
+    if not os.path.exists(os.path.join(project_path, "db")):
+        os.makedirs(os.path.join(project_path, "db"))
+    if not os.path.exists(os.path.join(project_path, "assets")):
+        os.makedirs(os.path.join(project_path, "assets"))
     project = sanitize_text(project.lower())
     projects[project] = project_path
     gdb.upsert_project(project, project_path, description, flavor)
+    gdb.flush()
     pdb = get_project_db(project, project_path)
 
     settings = {
@@ -72,6 +73,7 @@ def init(
         "flavor": settings.get("flavor"),
     }
     pdb.upsert_settings(settings)
+    pdb.flush()
 
     return pdb, projects[project]
 
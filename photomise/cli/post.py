@@ -2,12 +2,11 @@ import os
 import plistlib
 import random as rand
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from enum import Enum
 
-import pendulum
 import typer
-from atproto import Client, models
-from InquirerPy import inquirer
 
 from photomise.utilities import logging
 from photomise.database.shared import SharedDB
@@ -24,6 +23,15 @@ app = typer.Typer()
 logger, console = logging.setup_logging()
 
 
+def __getattr__(name: str):
+    # atproto is imported lazily, keep `from photomise.cli.post import Client` working
+    if name in ("Client", "Request", "models"):
+        import atproto
+
+        return getattr(atproto, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 @app.command()
 def atprotocol(
     project: str = typer.Argument(..., help="Project name"),
@@ -39,19 +47,32 @@ def atprotocol(
     """
     Post photos to Bluesky using the atprotocol API.
     """
+    # atproto builds its pydantic models on import, so only pay for it here
+    import httpx
+    from atproto import Client, Request, models
+    from InquirerPy import inquirer
 
     # Project initialization
     pdb, main_path = set_project(project)
-    client = Client()
+    # Keep one pooled keep-alive connection for the login, blob uploads and post
+    client = Client(
+        request=Request(
+            transport=httpx.HTTPTransport(
+                retries=3,
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+            )
+        )
+    )
 
     # Check flags
     if not user:
         user = get_bluesky_user(pdb)
         logger.debug(f"Bluesky user: {user}")
 
-    events = pdb.get_events_without_bluesky_posted()
+    # With --allow every event is a candidate, so skip the posted-events anti-join
+    events = None if allow else pdb.get_events_without_bluesky_posted()
     logger.debug(f"Bluesky events not previously posted: {events}")
-    if allow or not events:
+    if not events:
         events = pdb.get_events()
 
     if not events:
@@ -63,8 +84,9 @@ def atprotocol(
             message="Choose an event to post", choices=events.keys()
         ).execute()
     else:
-        random_event = rand.choice(list(events.values()))
-        event_name = random_event["event"]
+        # Events are keyed by name, so there is no need to copy the documents
+        event_name = rand.choice(list(events))
+    event = events[event_name]
 
     password = get_password_from_keyring(logger, user)
     try:
@@ -76,13 +98,9 @@ def atprotocol(
         logger.fatal(f"Login failed: {e}")
         return
 
-    image_alts = []
-    images = []
-    flavors = []
-    image_aspect_ratios = []
     photo_list = []
-    logger.debug(f"Checking for photos in: {events[event_name]}")
-    if len(events[event_name]["photos"]) > 4:
+    logger.debug(f"Checking for photos in: {event}")
+    if len(event["photos"]) > 4:
         ranking = pdb.get_rankings_by_event(event_name)
         if not ranking:
             logger.fatal("Too many photos to post to Bluesky")
@@ -94,66 +112,86 @@ def atprotocol(
             if len(photo_list) >= 4:
                 break
     else:
-        photo_list = events[event_name]["photos"]
+        photo_list = event["photos"]
 
+    photos = pdb.get_photos(set(photo_list))
+    settings = pdb.settings
+    tasks = []
     for path in photo_list:
         full_path = convert_to_absolute_path(path, main_path)
-        if os.path.exists(full_path):
-            logger.debug(f"Processing {full_path}")
-            height, width = get_image_aspect_ratio(full_path)
-            logger.debug(f"Height: {height}, Width: {width}")
-            if not height or not width:
-                height = 1
-                width = 1
-            image_aspect_ratios.append(
-                models.AppBskyEmbedDefs.AspectRatio(height=height, width=width)
+        if not os.path.exists(full_path):
+            continue
+
+        photo_entry = photos.get(path)
+        if photo_entry:
+            rotation_angle = photo_entry.get("rotation", 0)
+            quality = photo_entry.get("quality", settings.get("quality", 80))
+            description = photo_entry.get("description", f"{event_name}-{path}")
+            flavor = photo_entry.get("flavor", "")
+            max_dimension = photo_entry.get(
+                "max_dimension", settings.get("max_dimension", 1200)
             )
+        else:
+            rotation_angle = 0
+            quality = settings.get("quality", 80)
+            description = ""
+            flavor = ""
+            max_dimension = settings.get("max_dimension", 1200)
+        tasks.append(
+            (full_path, rotation_angle, quality, max_dimension, description, flavor)
+        )
 
-            photo_entry = pdb.get_photo(path)
-            if photo_entry:
-                rotation_angle = photo_entry.get("rotation", 0)
-                quality = photo_entry.get("quality", pdb.settings.get("quality", 80))
-                description = photo_entry.get("description", f"{event_name}-{path}")
-                flavor = photo_entry.get("flavor", "")
-                max_dimension = photo_entry.get(
-                    "max_dimension", pdb.settings.get("max_dimension", 1200)
-                )
-            else:
-                rotation_angle = 0
-                quality = pdb.settings.get("quality", 80)
-                description = ""
-                max_dimension = pdb.settings.get("max_dimension", 1200)
-            try:
-                compressed_image = compress_image(
-                    full_path,
-                    rotation_angle=rotation_angle,
-                    quality=quality,
-                    show=view,
-                    max_dimension=max_dimension,
-                )
+    try:
+        if view:
+            # Image previews open GUI viewers, so keep them on the main thread
+            results = [compress_photo(task, show=True) for task in tasks]
+        else:
+            # Pillow and libjpeg release the GIL, so threads scale without
+            # the start-up and pickling cost of worker processes
+            workers = max(1, min(len(tasks), os.cpu_count() or 1))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(compress_photo, tasks))
+    except Exception as e:
+        logger.fatal(f"Error compressing image: {e}")
+        return
 
-                images.append(compressed_image)
-                image_alts.append(description)
-                flavors.append(flavor)
-            except Exception as e:
-                logger.fatal(f"Error compressing image: {e}")
-                return
+    # One (image, size, alt, flavor) tuple per photo keeps everything aligned
+    images, sizes, image_alts, flavors = (
+        map(list, zip(*results)) if results else ([], [], [], [])
+    )
+    image_aspect_ratios = [
+        models.AppBskyEmbedDefs.AspectRatio(height=height, width=width)
+        for width, height in sizes
+    ]
 
     if not text:
         flavor_text = "\n\n".join(filter(None, flavors))
-        text = f"{events[event_name]['location']} ({pendulum.from_timestamp(events[event_name]['date']).format('YYYY-MMM-DD')})"
+        date = datetime.fromtimestamp(event["date"], tz=timezone.utc)
+        text = f"{event['location']} ({date.strftime('%Y-%b-%d')})"
         if flavor_text:
             text = f"{text}\n\n{flavor_text}"
 
     if images:
+        if dryrun:
+            logger.info(f"Dry run, not posting {len(images)} images: {text}")
+            return
+
+        # Same as client.send_images, but the blobs upload concurrently over the
+        # pooled connections before the single post that embeds them
         try:
-            if not dryrun:
-                response = client.send_images(
-                    text=text,
-                    images=images,
-                    image_alts=image_alts,
-                    image_aspect_ratios=image_aspect_ratios,
-                )
+            with ThreadPoolExecutor(max_workers=len(images)) as executor:
+                uploads = list(executor.map(client.upload_blob, images))
+            embed = models.AppBskyEmbedImages.Main(
+                images=[
+                    models.AppBskyEmbedImages.Image(
+                        alt=alt, image=upload.blob, aspect_ratio=aspect_ratio
+                    )
+                    for alt, upload, aspect_ratio in zip(
+                        image_alts, uploads, image_aspect_ratios
+                    )
+                ]
+            )
+            response = client.send_post(text=text, embed=embed)
         except Exception as e:
             logger.fatal(f"Upload failed: {e}")
             return
@@ -161,14 +199,14 @@ def atprotocol(
         if response:
             try:
                 logger.debug(f"Response: {response}")
-
-                if not dryrun:
-                    pdb.set_post(
-                        event_name=event_name,
-                        user=sanitize_text(user),
-                        platform="Bluesky",
-                        uri=(response.uri if hasattr(response, "uri") else None),
-                    )
+                pdb.set_post(
+                    event_name=event_name,
+                    user=sanitize_text(user),
+                    platform="Bluesky",
+                    uri=(response.uri if hasattr(response, "uri") else None),
+                )
+                # A scheduled run that gets killed must not post this event again
+                pdb.flush()
             except Exception as e:
                 logger.error(f"Error adding post to database: {e}")
         else:
@@ -177,6 +215,40 @@ def atprotocol(
         logger.error("No images to upload")
 
 
+def compress_photo(task: tuple, show: bool = False) -> tuple:
+    """
+    Compress a single photo for upload.
+
+    Args:
+        task (tuple): Path, rotation, quality, max dimension, description and flavor.
+        show (bool): Show the compressed image.
+
+    Returns:
+        tuple: Compressed image bytes, (width, height), description and flavor.
+    """
+    full_path, rotation_angle, quality, max_dimension, description, flavor = task
+    logger.debug(f"Processing {full_path}")
+    compressed_image = compress_image(
+        full_path,
+        rotation_angle=rotation_angle,
+        quality=quality,
+        show=show,
+        max_dimension=max_dimension,
+    )
+    if compressed_image is None:
+        raise ValueError(f"Unable to compress {full_path}")
+
+    # Measure the image being uploaded, so rotation is accounted for and the
+    # original file is only opened once
+    width, height = get_image_aspect_ratio(compressed_image)
+    logger.debug(f"Width: {width}, Height: {height}")
+    if not height or not width:
+        height = 1
+        width = 1
+    # upload_blob takes bytes; getvalue() hands over the encoded buffer in one piece
+    return compressed_image.getvalue(), (width, height), description, flavor
+
+
 class SupportedProtocols(str, Enum):
     atprotocol = "atprotocol"
 
@@ -235,12 +307,14 @@ def plist(
             f'"{executable_path}" "{script_dir}" post {platform.value} {project_path} -r' # "{executable_path}" "{script_dir}" init {project} -p "{project_path}" && 
         ],
         "StartCalendarInterval": calendar_intervals,
-        "StandardOutPath": f"{log_dir}/photomise-{project}.out",
-        "StandardErrorPath": f"{log_dir}/photomise-{project}.err",
+        "StandardOutPath": os.path.join(log_dir, f"photomise-{project}.out"),
+        "StandardErrorPath": os.path.join(log_dir, f"photomise-{project}.err"),
         "WorkingDirectory": project_path,
     }
 
-    output_file_path = f"{output_path}/click.blueribbon.photomise.{project}.plist"
+    output_file_path = os.path.join(
+        output_path, f"click.blueribbon.photomise.{project}.plist"
+    )
 
     with open(output_file_path, "wb") as plist_file:
         plistlib.dump(plist_data, plist_file)
@@ -2,13 +2,16 @@
 
 import logging
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 
 import pendulum
 import piexif
 import typer
-from InquirerPy import inquirer
 
 from photomise.database.shared import SharedDB
+from photomise.utilities.constants import IMAGE_EXTENSIONS
 from photomise.utilities.exif import (
     compress_image,
     convert_to_degrees,
@@ -16,6 +19,7 @@ from photomise.utilities.exif import (
     extract_datetime,
     extract_exif_info,
     extract_gps,
+    open_image,
 )
 from photomise.utilities.logging import setup_logging
 from photomise.utilities.project import (
@@ -32,6 +36,28 @@ from photomise.utilities.shared import make_min_max_prompt
 app = typer.Typer()
 logger, console = setup_logging()
 
+# Photo records are saved in batches of this size while images are reviewed
+PHOTO_SAVE_BATCH = 10
+
+
+def read_exif_ahead(executor, paths, skip: set, window: int):
+    """
+    Yield (file_path, relative_path, future) in order, with at most `window` EXIF
+    reads queued ahead of the caller so parsed tags don't pile up in memory.
+    Photos whose relative path is in `skip` get None instead of a read.
+    """
+    pending = deque()
+    for file_path, relative_path in paths:
+        if relative_path in skip:
+            exif_read = None
+        else:
+            exif_read = executor.submit(extract_exif_info, file_path)
+        pending.append((file_path, relative_path, exif_read))
+        if len(pending) > window:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
+
 
 @app.command()
 def images(
@@ -47,149 +73,182 @@ def images(
     ),
 ):
     """Process image by rotating, scaling, changing quality, or apply filters."""
+    # InquirerPy pulls in prompt_toolkit, so only import it once a prompt is needed
+    from InquirerPy import inquirer
 
     # Project initialization
     pdb, main_path = set_project(project)
     logging.debug(f"Project: {project}, Path: {main_path}, Settings: {pdb.settings}")
     gdb = SharedDB()
-    photos_path = f"{main_path}/assets"
+    photos_path = os.path.join(main_path, "assets")
 
-    non_hidden_files = list(get_non_hidden_files(photos_path))
+    # Only the first file is needed up front, the rest of the tree is walked
+    # while earlier photos are being reviewed
+    non_hidden_files = get_non_hidden_files(photos_path, IMAGE_EXTENSIONS)
+    first_file = next(non_hidden_files)
 
-    if non_hidden_files == [(None, None)]:
+    if first_file == (None, None):
         logging.fatal(
             "No files found in the project folder's assets directory, please add photos before running."
         )
         typer.Exit(1)
 
-    for dir, file in non_hidden_files:
-
-        file_path = f"{dir}/{file}"
-        relative_path = convert_to_relative_path(file_path, main_path)
-
-        console.print()
-        console.print(f"[bold]Checking {file_path}[/bold]")
-        need_to_convert_path = False
-        photo_record = pdb.get_photo(relative_path)
-        if not photo_record:
-            photo_record = pdb.get_photo(file_path)
-            need_to_convert_path = True
-        if photo_record:
-            rotation_angle = photo_record.get("rotation", 0)
-            quality = photo_record.get("quality", pdb.settings.get("quality"))
-            description = photo_record.get("description", "")
-            flavor = photo_record.get("flavor", "")
-            brightness = photo_record.get("brightness", 1.0)
-            contrast = photo_record.get("contrast", 1.0)
-            color = photo_record.get("color", 1.0)
-            sharpness = photo_record.get("sharpness", 1.0)
-        else:
-            rotation_angle = 0
-            quality = pdb.settings.get("quality")
-            description = ""
-            flavor = ""
-            brightness = 1.0
-            contrast = 1.0
-            color = 1.0
-            sharpness = 1.0
-        if view or all:
-            while True:
-                _ = compress_image(
-                    image_path=file_path,
-                    rotation_angle=rotation_angle,
-                    quality=quality,
-                    brightness=brightness,
-                    contrast=contrast,
-                    color=color,
-                    sharpness=sharpness,
-                    show=True,
-                )
-                if inquirer.confirm(message="Does the image look okay?").execute():
-                    break
-                else:
-                    quality = inquirer.select(
-                        message="Choose a quality level",
-                        choices=[10, 20, 30, 40, 50, 60, 70, 80, 90, 100],
-                        default=quality,
-                    ).execute()
-
-                    rotation_angle = inquirer.select(
-                        message="Choose a rotation angle",
-                        choices=[0, 90, 180, 270],
-                        default=rotation_angle,
-                    ).execute()
-
-                    filter_choices = ["None"] + [
-                        filter["name"] for filter in gdb.get_filters_all()
-                    ]
-                    filter_choices.append("Custom")
-
-                    filter_search_params = {
-                        "brightness": brightness,
-                        "contrast": contrast,
-                        "color": color,
-                        "sharpness": sharpness,
-                    }
-
-                    filter_to_apply = inquirer.select(
-                        message="Choose a filter",
-                        choices=filter_choices,
-                        default=gdb.get_filter_from_values(filter_search_params),
-                    ).execute()
-
-                    match filter_to_apply:
-                        case "Custom":
-                            brightness = make_min_max_prompt(
-                                "Adjust brightness", brightness
-                            )
-                            contrast = make_min_max_prompt("Adjust contrast", contrast)
-                            color = make_min_max_prompt("Adjust color", color)
-                            sharpness = make_min_max_prompt(
-                                "Adjust sharpness", sharpness
-                            )
-                        case "None":
-                            brightness = 1.0
-                            contrast = 1.0
-                            color = 1.0
-                            sharpness = 1.0
-                        case _:
-                            filter = gdb.get_filter(filter_to_apply)
-                            brightness = filter.get("brightness", 1.0)
-                            contrast = filter.get("contrast", 1.0)
-                            color = filter.get("color", 1.0)
-                            sharpness = filter.get("sharpness", 1.0)
-
-        if (pdb.settings.get("description") and not description) or all:
-            description = inquirer.text(
-                message="Enter a description for visually impaired users about this image:",
-                default=description,
-            ).execute()
-        if (pdb.settings.get("flavor") and not flavor) or all:
-            flavor = inquirer.text(
-                message="Enter flavor text for this image:",
-                default=flavor,
-            ).execute()
+    # Saved filters can't change during a session, so they are read once for
+    # every preview below
+    filters = {filter["name"]: filter for filter in gdb.get_filters_all()}
+    filter_choices = ["None", *filters, "Custom"]
+    filter_names = {}
+    for filter in filters.values():
+        filter_names.setdefault(
+            (
+                filter.get("brightness"),
+                filter.get("contrast"),
+                filter.get("color"),
+                filter.get("sharpness"),
+            ),
+            filter["name"],
+        )
 
-        if need_to_convert_path:
-            photo_path = file_path
-        else:
-            photo_path = relative_path
+    # TinyDB rewrites its table index on every write, so photos are saved a
+    # batch at a time, and whatever is pending when the session is interrupted
+    # is saved as well
+    pending_photos = []
+    try:
+        for dir, file in chain([first_file], non_hidden_files):
+            if not file:
+                # Placeholder for a folder without any images
+                continue
 
-        photo = {
-            "path": photo_path,
-            "description": description,
-            "flavor": flavor,
-            "rotation": rotation_angle,
-            "quality": quality,
-            "brightness": brightness,
-            "contrast": contrast,
-            "color": color,
-            "sharpness": sharpness,
-        }
+            file_path = os.path.join(dir, file)
+            relative_path = convert_to_relative_path(file_path, main_path)
+
+            console.print()
+            console.print(f"[bold]Checking {file_path}[/bold]")
+            need_to_convert_path = False
+            photo_record = pdb.get_photo(relative_path)
+            if not photo_record:
+                photo_record = pdb.get_photo(file_path)
+                need_to_convert_path = True
+            if photo_record:
+                rotation_angle = photo_record.get("rotation", 0)
+                quality = photo_record.get("quality", pdb.settings.get("quality"))
+                description = photo_record.get("description", "")
+                flavor = photo_record.get("flavor", "")
+                brightness = photo_record.get("brightness", 1.0)
+                contrast = photo_record.get("contrast", 1.0)
+                color = photo_record.get("color", 1.0)
+                sharpness = photo_record.get("sharpness", 1.0)
+            else:
+                rotation_angle = 0
+                quality = pdb.settings.get("quality")
+                description = ""
+                flavor = ""
+                brightness = 1.0
+                contrast = 1.0
+                color = 1.0
+                sharpness = 1.0
+            if view or all:
+                # Decode once, each rejected preview only redoes the edits
+                try:
+                    preview_source = open_image(file_path)
+                except OSError:
+                    # compress_image reports the unreadable file itself
+                    preview_source = file_path
+                while True:
+                    _ = compress_image(
+                        image_path=preview_source,
+                        rotation_angle=rotation_angle,
+                        quality=quality,
+                        brightness=brightness,
+                        contrast=contrast,
+                        color=color,
+                        sharpness=sharpness,
+                        show=True,
+                        preview=True,
+                    )
+                    if inquirer.confirm(message="Does the image look okay?").execute():
+                        break
+                    else:
+                        quality = inquirer.select(
+                            message="Choose a quality level",
+                            choices=[10, 20, 30, 40, 50, 60, 70, 80, 90, 100],
+                            default=quality,
+                        ).execute()
+
+                        rotation_angle = inquirer.select(
+                            message="Choose a rotation angle",
+                            choices=[0, 90, 180, 270],
+                            default=rotation_angle,
+                        ).execute()
+
+                        filter_to_apply = inquirer.select(
+                            message="Choose a filter",
+                            choices=filter_choices,
+                            default=filter_names.get(
+                                (brightness, contrast, color, sharpness), "None"
+                            ),
+                        ).execute()
+
+                        match filter_to_apply:
+                            case "Custom":
+                                brightness = make_min_max_prompt(
+                                    "Adjust brightness", brightness
+                                )
+                                contrast = make_min_max_prompt(
+                                    "Adjust contrast", contrast
+                                )
+                                color = make_min_max_prompt("Adjust color", color)
+                                sharpness = make_min_max_prompt(
+                                    "Adjust sharpness", sharpness
+                                )
+                            case "None":
+                                brightness = 1.0
+                                contrast = 1.0
+                                color = 1.0
+                                sharpness = 1.0
+                            case _:
+                                filter = filters[filter_to_apply]
+                                brightness = filter.get("brightness", 1.0)
+                                contrast = filter.get("contrast", 1.0)
+                                color = filter.get("color", 1.0)
+                                sharpness = filter.get("sharpness", 1.0)
+
+            if (pdb.settings.get("description") and not description) or all:
+                description = inquirer.text(
+                    message="Enter a description for visually impaired users about this image:",
+                    default=description,
+                ).execute()
+            if (pdb.settings.get("flavor") and not flavor) or all:
+                flavor = inquirer.text(
+                    message="Enter flavor text for this image:",
+                    default=flavor,
+                ).execute()
 
-        updated = pdb.upsert_photo(photo)
+            if need_to_convert_path:
+                photo_path = file_path
+            else:
+                photo_path = relative_path
+
+            photo = {
+                "path": photo_path,
+                "description": description,
+                "flavor": flavor,
+                "rotation": rotation_angle,
+                "quality": quality,
+                "brightness": brightness,
+                "contrast": contrast,
+                "color": color,
+                "sharpness": sharpness,
+            }
 
-        logging.debug(f"Updated Photo: {updated}")
+            pending_photos.append(photo)
+            if len(pending_photos) >= PHOTO_SAVE_BATCH:
+                pdb.upsert_photos(pending_photos)
+                pdb.flush()
+                pending_photos = []
+    finally:
+        updated = pdb.upsert_photos(pending_photos)
+        logging.debug(f"Updated Photos: {updated}")
 
     pdb.close()
     gdb.close()
@@ -204,8 +263,15 @@ def location(
         "-l",
         help="Helper link to append to latitude and longitude to help find location",
     ),
+    skip_no_gps: bool = typer.Option(
+        False,
+        "--skip-no-gps",
+        "-s",
+        help="Skip photos without GPS data instead of prompting for coordinates",
+    ),
 ):
     """Associate photos with an event by location."""
+    from InquirerPy import inquirer
 
     # Project initialization
     pdb, main_path = set_project(project)
@@ -215,9 +281,9 @@ def location(
     except Exception as e:
         logging.fatal(f"Error: {e}")
         typer.Exit(1)
-    photos_path = f"{main_path}/assets"
+    photos_path = os.path.join(main_path, "assets")
 
-    non_hidden_files = list(get_non_hidden_files(photos_path))
+    non_hidden_files = list(get_non_hidden_files(photos_path, IMAGE_EXTENSIONS))
 
     if non_hidden_files == [(None, None)]:
         logging.fatal(
@@ -225,154 +291,190 @@ def location(
         )
         typer.Exit(1)
 
-    for dir, file in get_non_hidden_files(photos_path):
-        date_object = None
-        lat = None
-        lon = None
-        file_path = f"{dir}/{file}"
-        relative_path = convert_to_relative_path(file_path, main_path)
-
-        # Check for duplicates
-        duplicate_events = pdb.find_events_with_photo(relative_path)
-        if len(duplicate_events) > 1:
-            handle_duplicate_events(pdb, duplicate_events, relative_path)
+    file_paths = [os.path.join(dir, file) for dir, file in non_hidden_files if file]
+    relative_paths = [convert_to_relative_path(path, main_path) for path in file_paths]
 
-        try:
-            exif_tags = extract_exif_info(file_path)
-
-            lat, lon = extract_gps(exif_tags)
+    # Read EXIF in the background while the loop below waits on prompts.
+    # Photos filed under an event on an earlier run are not read again
+    filed_photos = pdb.get_photos_in_events()
+    workers = min(8, os.cpu_count() or 1)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for file_path, relative_path, exif_read in read_exif_ahead(
+            executor,
+            zip(file_paths, relative_paths),
+            filed_photos,
+            window=workers * 4,
+        ):
+            # Persist the previous photo's answers before asking about this one,
+            # a killed terminal skips both atexit and finally
+            pdb.flush()
+            gdb.flush()
+
+            date_object = None
+            exif_tags = None
+            lat = None
+            lon = None
+
+            # Check for duplicates
+            duplicate_events = pdb.find_events_with_photo(relative_path)
+            if len(duplicate_events) > 1:
+                handle_duplicate_events(pdb, duplicate_events, relative_path)
+
+            if exif_read is None:
+                logging.debug(f"Already in an event, skipping {file_path}")
+                continue
 
-            date_object = extract_datetime(exif_tags)
-        except piexif.InvalidImageDataError:
-            logging.warning("Invalid image data")
-            continue
-        except Exception as e:
-            logging.info(f"Error extracting exif info: {e}")
-
-        console.print()
-        if not date_object:
-            date_object = pendulum.parse(
-                inquirer.text("Please enter a date for this photo").execute()
-            )
-
-        if lat and lon:
-            location_name = gdb.find_location(lat, lon)
-            if location_name:
-                console.print(f"Location: {location_name}")
-                console.print(f"Latitude: {lat}, Longitude: {lon}")
-            else:
-                if link:
-                    from urllib.parse import quote
+            try:
+                exif_tags = exif_read.result()
 
-                    encoded_lat = quote(str(lat))
-                    encoded_lon = quote(str(lon))
-                    console.print(
-                        f"[link={link}{encoded_lat},{encoded_lon}]Helper link[/link]"
-                    )
-                location_name = inquirer.text(
-                    f"Please enter a location name for {lat},{lon}"
-                ).execute()
-                params = {"name": location_name, "latitude": lat, "longitude": lon}
-                gdb.upsert_location(params)
-        else:
-            if inquirer.confirm(
-                "No GPS info found - would you like to add some?"
-            ).execute():
-                try:
-                    if "°" in lat or "S" in lat or "N" in lat:
-                        if "S" in lat:
-                            lat = -convert_to_degrees(lat)
-                        else:
-                            lat = convert_to_degrees(lat)
-                    else:
-                        lat = float(lat)
-                except ValueError:
-                    console.print("Invalid latitude format.")
+                lat, lon = extract_gps(exif_tags)
+                if skip_no_gps and not (lat and lon):
+                    # Nothing else is read for a photo that can't be placed
+                    logging.debug(f"No GPS data, skipping {file_path}")
                     continue
 
-                lon = inquirer.text("Longitude").execute()
-                try:
-                    if "°" in lon or "W" in lon or "E" in lon:
-                        if "W" in lon:
-                            lon = -convert_to_degrees(lon)
-                        lon = convert_to_degrees(lon)
-                    else:
-                        lon = float(lon)
-                except ValueError:
-                    console.print("Invalid longitude format.")
-                    continue
+                date_object = extract_datetime(exif_tags)
+            except piexif.InvalidImageDataError:
+                logging.warning("Invalid image data")
+                continue
+            except Exception as e:
+                logging.info(f"Error extracting exif info: {e}")
+
+            console.print()
+            if not date_object:
+                date_object = pendulum.parse(
+                    inquirer.text("Please enter a date for this photo").execute()
+                )
 
-                location_name = gdb.get_location_coord(lat, lon)
+            if lat and lon:
+                location_name = gdb.find_location(lat, lon)
                 if location_name:
                     console.print(f"Location: {location_name}")
+                    console.print(f"Latitude: {lat}, Longitude: {lon}")
                 else:
                     if link:
-                        console.print(f"[link={link}{lat},{lon}]Helper link[/link]")
+                        from urllib.parse import quote
+
+                        encoded_lat = quote(str(lat))
+                        encoded_lon = quote(str(lon))
+                        console.print(
+                            f"[link={link}{encoded_lat},{encoded_lon}]Helper link[/link]"
+                        )
                     location_name = inquirer.text(
                         f"Please enter a location name for {lat},{lon}"
                     ).execute()
-                    params = {
-                        "name": location_name,
-                        "latitude": lat,
-                        "longitude": lon,
-                    }
+                    params = {"name": location_name, "latitude": lat, "longitude": lon}
                     gdb.upsert_location(params)
-                # add exif info to file
-                exif_dict = piexif.load(file_path)
-                exif_dict["GPS"] = {
-                    piexif.GPSIFD.GPSLatitude: deg_to_dms_rational(lat),
-                    piexif.GPSIFD.GPSLatitudeRef: b"N" if lat > 0 else b"S",
-                    piexif.GPSIFD.GPSLongitude: deg_to_dms_rational(lon),
-                    piexif.GPSIFD.GPSLongitudeRef: b"E" if lon > 0 else b"W",
-                }
-                exif_bytes = piexif.dump(exif_dict)
-                piexif.insert(exif_bytes, file_path)
             else:
-                console.print("Skipping...")
-                continue
-
-        if date_object:
-            console.print(f"Taken: {date_object.format('YYYY-MM-DD HH:MM')}")
-            event_date, event_name, event_same = pdb.same_event(
-                date_object, location_name
-            )
-        else:
-            event_date = date_object
-            event_same = False
-            event_name = None
+                if inquirer.confirm(
+                    "No GPS info found - would you like to add some?"
+                ).execute():
+                    try:
+                        if "°" in lat or "S" in lat or "N" in lat:
+                            if "S" in lat:
+                                lat = -convert_to_degrees(lat)
+                            else:
+                                lat = convert_to_degrees(lat)
+                        else:
+                            lat = float(lat)
+                    except ValueError:
+                        console.print("Invalid latitude format.")
+                        continue
+
+                    lon = inquirer.text("Longitude").execute()
+                    try:
+                        if "°" in lon or "W" in lon or "E" in lon:
+                            if "W" in lon:
+                                lon = -convert_to_degrees(lon)
+                            lon = convert_to_degrees(lon)
+                        else:
+                            lon = float(lon)
+                    except ValueError:
+                        console.print("Invalid longitude format.")
+                        continue
+
+                    location_name = gdb.get_location_coord(lat, lon)
+                    if location_name:
+                        console.print(f"Location: {location_name}")
+                    else:
+                        if link:
+                            console.print(f"[link={link}{lat},{lon}]Helper link[/link]")
+                        location_name = inquirer.text(
+                            f"Please enter a location name for {lat},{lon}"
+                        ).execute()
+                        params = {
+                            "name": location_name,
+                            "latitude": lat,
+                            "longitude": lon,
+                        }
+                        gdb.upsert_location(params)
+                    # add exif info to file, reusing the tags read above
+                    exif_dict = exif_tags or piexif.load(file_path)
+                    exif_dict["GPS"] = {
+                        piexif.GPSIFD.GPSLatitude: deg_to_dms_rational(lat),
+                        piexif.GPSIFD.GPSLatitudeRef: b"N" if lat > 0 else b"S",
+                        piexif.GPSIFD.GPSLongitude: deg_to_dms_rational(lon),
+                        piexif.GPSIFD.GPSLongitudeRef: b"E" if lon > 0 else b"W",
+                    }
+                    exif_bytes = piexif.dump(exif_dict)
+                    piexif.insert(exif_bytes, file_path)
+                else:
+                    console.print("Skipping...")
+                    continue
 
-        if item_duplicate(pdb, gdb, date_object, lat, lon):
-            logging.debug("This item appears to be a duplicate and will be skipped.")
-            continue
+            # A set lookup settles duplicates before any event matching is done
+            if item_duplicate(pdb, date_object, lat, lon):
+                logging.debug(
+                    "This item appears to be a duplicate and will be skipped."
+                )
+                continue
 
-        if pdb.settings.get("auto_event"):
-            location_name_sanitized = sanitize_text(location_name)
-            event_name = f"{event_date.format('YYYYMMDD')}-{location_name_sanitized}"
-        else:
-            event_name = inquirer.text(
-                f"Please name this event from {event_date.format('YYYY-MM-DD')} at {location_name}"
-            ).execute()
+            if date_object:
+                console.print(f"Taken: {date_object.format('YYYY-MM-DD HH:MM')}")
+                event_date, event_name, event_same = pdb.same_event(
+                    date_object, location_name
+                )
+            else:
+                event_date = date_object
+                event_same = False
+                event_name = None
+
+            if pdb.settings.get("auto_event"):
+                location_name_sanitized = sanitize_text(location_name)
+                event_name = (
+                    f"{event_date.format('YYYYMMDD')}-{location_name_sanitized}"
+                )
+            else:
+                event_name = inquirer.text(
+                    f"Please name this event from {event_date.format('YYYY-MM-DD')} at {location_name}"
+                ).execute()
 
-        if event_same:
-            logging.debug("This event appears to be a duplicate and will be skipped.")
-            logging.debug(f"Event Name: {event_name}")
-            event = pdb.get_event(event_name)
-            logging.debug(f"Event: {event}")
-            if relative_path not in event.get("photos", []):
-                pdb.upsert_event(event, relative_path)
+            if event_same:
+                logging.debug(
+                    "This event appears to be a duplicate and will be skipped."
+                )
+                logging.debug(f"Event Name: {event_name}")
+                event = pdb.get_event(event_name)
+                logging.debug(f"Event: {event}")
+                if relative_path not in event.get("photos", []):
+                    pdb.upsert_event(event, relative_path)
+                else:
+                    console.print("This photo has already been added to this event.")
             else:
-                console.print("This photo has already been added to this event.")
-        else:
-            pdb.upsert_event(
-                {
-                    "event": event_name,
-                    "latitude": lat,
-                    "longitude": lon,
-                    "location": location_name,
-                    "date": date_object.timestamp(),
-                    "photos": [relative_path],
-                }
-            )
+                pdb.upsert_event(
+                    {
+                        "event": event_name,
+                        "latitude": lat,
+                        "longitude": lon,
+                        "location": location_name,
+                        "date": date_object.timestamp(),
+                        "photos": [relative_path],
+                    }
+                )
+    finally:
+        # Reads still queued are dropped on Ctrl-C instead of being waited for
+        executor.shutdown(cancel_futures=True)
 
     pdb.close()
     gdb.close()
@@ -397,6 +499,7 @@ def rank(
     ),
 ):
     """Rank files in order of preference for socials that only allow a certain number of attachments."""
+    from InquirerPy import inquirer
 
     # Project initialization
     pdb, main_path = set_project(project)
@@ -424,9 +527,10 @@ def rank(
         if len(photos) <= greater_than:
             continue
         console.print(f"There are {len(photos)} photos in {event_name}.")
+        photo_records = pdb.get_photos(set(photos))
         if view:
             for photo_path in photos:
-                photo = pdb.get_photo(photo_path)
+                photo = photo_records.get(photo_path)
                 absolute_path = convert_to_absolute_path(photo_path, main_path)
                 compress_image(
                     image_path=absolute_path,
@@ -437,6 +541,7 @@ def rank(
                     color=photo["color"],
                     sharpness=photo["sharpness"],
                     show=True,
+                    preview=True,
                 )
         for photo in photos:
             previous_rank = pdb.get_rank_by_photo(photo)
@@ -458,6 +563,8 @@ def rank(
                 "path": photo,
             }
             pdb.upsert_rankings(ranking)
+            # Keep each answer if a long ranking session is killed
+            pdb.flush()
 
         if inquirer.confirm(message="Would you like to review the rankings?").execute():
 
@@ -468,7 +575,7 @@ def rank(
                 absolute_path_rank = convert_to_absolute_path(rank["path"], main_path)
                 console.print(f"\tRank {rank['rank']}: {absolute_path_rank}")
                 if view:
-                    photo = pdb.get_photo(photo_path)
+                    photo = photo_records.get(rank["path"])
                     compress_image(
                         image_path=absolute_path_rank,
                         rotation_angle=photo["rotation"],
@@ -478,6 +585,7 @@ def rank(
                         color=photo["color"],
                         sharpness=photo["sharpness"],
                         show=True,
+                        preview=True,
                     )
     pdb.close()
 
@@ -492,6 +600,7 @@ def prune(
     all: bool = typer.Option(False, "--all", "-a", help="Review all photos"),
 ):
     """Remove assets from events."""
+    from InquirerPy import inquirer
 
     # Project initialization
     pdb, main_path = set_project(project)
@@ -520,8 +629,9 @@ def prune(
             typer.Exit(1)
         console.print(f"There are {len(photos)} photos in this event.")
         if view:
+            photo_records = pdb.get_photos(set(photos))
             for photo_path in photos:
-                photo = pdb.get_photo(photo_path)
+                photo = photo_records.get(photo_path)
                 absolute_path = convert_to_absolute_path(photo_path, main_path)
                 compress_image(
                     image_path=absolute_path,
@@ -532,6 +642,7 @@ def prune(
                     color=photo["color"],
                     sharpness=photo["sharpness"],
                     show=True,
+                    preview=True,
                 )
         for photo in photos:
             if inquirer.confirm(
@@ -543,8 +654,11 @@ def prune(
                 ).execute():
                     pdb.remove_photo_from_event(events, photo)
                     pdb.remove_photo(photo)
+                    # Events on disk must not list a file that is already gone
+                    pdb.flush()
                     os.remove(convert_to_absolute_path(photo, main_path))
                 else:
                     pdb.remove_photo_from_event(events, photo, event_name)
+                    pdb.flush()
 
     pdb.close()
@@ -1,4 +1,3 @@
-from InquirerPy import inquirer
 import typer
 
 from photomise.cli import filters, locations
@@ -15,6 +14,8 @@ logging, console = setup_logging()
 @app.command()
 def interactive():
     """Edit global settings via an interactive menu."""
+    from InquirerPy import inquirer
+
     try:
         gdb = SharedDB()
     except Exception as e:
@@ -1,25 +1,89 @@
+import atexit
 import json
+import os
 from pathlib import Path
 
-from tinydb import Query, TinyDB
+from tinydb import TinyDB
+from tinydb.middlewares import CachingMiddleware
+from tinydb.storages import JSONStorage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson can only indent by two spaces, so the stdlib fallback matches it and a
+# database reads the same whichever serializer wrote it
+JSON_INDENT = 2
+
+
+class ORJSONStorage(JSONStorage):
+    """JSONStorage that (de)serializes with orjson, writing UTF-8 bytes directly."""
+
+    def __init__(self, path: str, create_dirs=False, access_mode="rb+", **kwargs):
+        super().__init__(path, create_dirs=create_dirs, access_mode=access_mode)
+
+    def read(self):
+        self._handle.seek(0)
+        data = self._handle.read()
+        return orjson.loads(data) if data else None
+
+    def write(self, data: dict):
+        self._handle.seek(0)
+        self._handle.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.truncate()
 
 
 class DatabaseManager:
+    # One cached TinyDB per file, so every manager of a path sees the same data
+    _databases = {}
+
     def __init__(self, db_path: Path):
         self.path = db_path
-        self.db = TinyDB(db_path)
-        self._query = Query()
+        self.db = self._databases.get(str(db_path))
+        if self.db is None:
+            storage = ORJSONStorage if orjson else JSONStorage
+            # The storage writes indented JSON itself, so a flush never has to
+            # be parsed and dumped a second time just to be readable
+            self.db = TinyDB(
+                db_path,
+                storage=CachingMiddleware(storage),
+                indent=JSON_INDENT,
+                ensure_ascii=False,
+            )
+            self._databases[str(db_path)] = self.db
+            # Cached writes reach the disk on close, or earlier through flush().
+            # Registered once per database, not once per manager sharing it
+            atexit.register(self.close)
+
+    def get_table(self, table_name: str, **kwargs):
+        return self.db.table(table_name, **kwargs)
 
-    def get_table(self, table_name: str):
-        return self.db.table(table_name)
+    def flush(self):
+        """Write cached changes now, so a killed process can't lose them."""
+        # CachingMiddleware skips the write when nothing changed
+        self.db.storage.flush()
 
     def close(self):
+        if self._databases.get(str(self.path)) is not self.db:
+            return
+        del self._databases[str(self.path)]
+        # CachingMiddleware only writes if something changed
         self.db.close()
-        self.make_json_readable()
 
     def make_json_readable(self) -> str:
+        if orjson:
+            with open(self.path, "rb") as file:
+                data = orjson.loads(file.read())
+
+            with open(self.path, "wb") as file:
+                file.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            return
+
         with open(self.path, "r") as file:
             data = json.load(file)
 
         with open(self.path, "w") as file:
-            json.dump(data, file, indent=4, ensure_ascii=False)
+            json.dump(data, file, indent=JSON_INDENT, ensure_ascii=False)
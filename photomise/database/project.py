@@ -1,13 +1,31 @@
 from pathlib import Path
 import os
+import time
+from bisect import bisect_left, bisect_right
 
 import pendulum
+from tinydb import Query
 
 from photomise.database.base import DatabaseManager
 from photomise.utilities.logging import setup_logging
 
 logging, console = setup_logging()
 
+# Field paths are built once; each lookup only creates the comparison
+DOC_ID = Query().doc_id
+EVENT = Query().event
+PATH = Query().path
+WHERE = Query().where
+
+
+def event_key(date: float, latitude: float, longitude: float) -> tuple:
+    """Hashable (timestamp, latitude, longitude) key, rounded to absorb float noise."""
+    return (
+        date,
+        None if latitude is None else round(latitude, 6),
+        None if longitude is None else round(longitude, 6),
+    )
+
 
 class ProjectDB(DatabaseManager):
     def __init__(self, project_name: str=None, project_path: Path=None):
@@ -22,9 +40,9 @@ class ProjectDB(DatabaseManager):
             raise ValueError("Project name or path is required.")
         if not project_name:
             if os.path.exists(project_path):
-                files = os.listdir(f"{project_path}/db")
+                files = os.listdir(os.path.join(project_path, "db"))
                 if len(files) == 1:
-                    project_name = files[0].split(".")[0]
+                    project_name = os.path.splitext(files[0])[0]
                 else:
                     raise ValueError("Project name is required.")
             else:
@@ -36,17 +54,24 @@ class ProjectDB(DatabaseManager):
                 project_path = projects[project_name]
             except ValueError:
                 raise ValueError("Project path not found in global DB.")
-        super().__init__(f"{project_path}/db/{project_name}.json")
+        db_path = os.path.join(project_path, "db", f"{project_name}.json")
+        super().__init__(db_path)
         self.project_name = project_name
         self.project_path = project_path
-        self.db_path = f"{project_path}/db/{project_name}.json"
+        self.db_path = db_path
         self._events = self.get_table("events")
-        self._photos = self.get_table("photos")
+        self._photos = self.get_table("photos", cache_size=None)
         self._videos = self.get_table("videos")
         self._settings = self.get_table("settings")
-        self._posts = self.get_table("posts")
+        self._posts = self.get_table("posts", cache_size=None)
         self._accounts = self.get_table("accounts")
         self._rankings = self.get_table("rankings")
+        self._settings_doc = None
+        self._event_ids = None
+        self._event_keys = None
+        self._event_snapshot = None
+        self._event_timeline = None
+        self._photo_ids = None
 
     # Settings table methods
     @property
@@ -57,7 +82,12 @@ class ProjectDB(DatabaseManager):
         Returns:
             dict: Settings data.
         """
-        return self._settings.all()[0] if self._settings.all() else {}
+        # Read for every photo by the process commands, written only through
+        # upsert_settings
+        if self._settings_doc is None:
+            settings = self._settings.all()
+            self._settings_doc = settings[0] if settings else {}
+        return self._settings_doc
 
     def upsert_settings(self, settings: dict):
         """
@@ -69,7 +99,8 @@ class ProjectDB(DatabaseManager):
         Returns:
             bool: True if the settings were updated, False if they were inserted.
         """
-        return self._settings.upsert(settings, self._query.doc_id == 1)
+        self._settings_doc = None
+        return self._settings.upsert(settings, DOC_ID == 1)
 
     # Accounts table methods
     def get_bluesky_user(self):
@@ -80,7 +111,7 @@ class ProjectDB(DatabaseManager):
             str: Bluesky username.
         """
         try:
-            return self._accounts.get(self._query.where == "Bluesky")["user"]
+            return self._accounts.get(WHERE == "Bluesky")["user"]
         except TypeError:
             return None
 
@@ -105,7 +136,18 @@ class ProjectDB(DatabaseManager):
             dict: Event data.
         """
         logging.info(f"[{self.project_name}] Getting event: {event_name}")
-        return self._events.get(self._query.event == event_name)
+        doc_id = self._get_event_ids().get(event_name)
+        if doc_id is None:
+            return None
+        return self._events.get(doc_id=doc_id)
+
+    def _get_event_ids(self) -> dict:
+        """Index of event names to document IDs, so lookups skip the table scan."""
+        if self._event_ids is None:
+            self._event_ids = {}
+            for document in self._events.all():
+                self._event_ids.setdefault(document["event"], document.doc_id)
+        return self._event_ids
 
     def get_events(self, event_names: list = None):
         """
@@ -130,15 +172,35 @@ class ProjectDB(DatabaseManager):
         Returns:
             dict: Dictionary of events.
         """
-        events = {}
-        posted_events = []
-        for post in self._posts.all():
-            if post["where"] == "Bluesky":
-                posted_events.append(post["event"])
-        for event in self._events.all():
-            if event["event"] not in posted_events:
-                events[event["event"]] = event
-        return events
+        # search() results are kept in the posts table's query cache
+        posted_events = {
+            post["event"] for post in self._posts.search(WHERE == "Bluesky")
+        }
+        return {
+            event["event"]: event
+            for event in self._events.all()
+            if event["event"] not in posted_events
+        }
+
+    def _get_event_snapshot(self) -> dict:
+        """Events keyed by name, read once and kept in step with writes made here."""
+        if self._event_snapshot is None:
+            self._event_snapshot = {
+                event["event"]: event for event in self._events.all()
+            }
+        return self._event_snapshot
+
+    def _get_event_timeline(self) -> tuple:
+        """Event timestamps in ascending order, with the event names alongside."""
+        if self._event_timeline is None:
+            events = sorted(
+                self._get_event_snapshot().values(), key=lambda event: event["date"]
+            )
+            self._event_timeline = (
+                [event["date"] for event in events],
+                [event["event"] for event in events],
+            )
+        return self._event_timeline
 
     def same_event(
         self, date: pendulum, location: str, max_time_delta_in_hours: int = 8
@@ -154,25 +216,42 @@ class ProjectDB(DatabaseManager):
         Returns:
             tuple: Date of the event, event data, and True if the event exists, False otherwise.
         """
-        for item in self._events.all():
-            db_date = pendulum.from_timestamp(item["date"])
-            time_delta = date.diff(db_date).in_hours()
-
-            if time_delta < max_time_delta_in_hours and location == item["location"]:
-                return db_date, item["event"], True
+        # Only events strictly less than the time delta away can match
+        timestamp = date.timestamp()
+        window = max_time_delta_in_hours * 3600
+        dates, names = self._get_event_timeline()
+        start = bisect_right(dates, timestamp - window)
+        end = bisect_left(dates, timestamp + window)
+
+        events = self._get_event_snapshot()
+        for name in names[start:end]:
+            item = events[name]
+            if location == item["location"]:
+                return pendulum.from_timestamp(item["date"]), item["event"], True
         return date, None, False
 
-    def is_event(self, date: pendulum.DateTime):
+    def is_event_at(self, date: pendulum.DateTime, latitude: float, longitude: float):
         """
-        Check if an event exists in the database.
+        Check if an event exists in the database at the same date and coordinates.
 
         Args:
             date (pendulum.DateTime): Date of the event.
+            latitude (float): Latitude of the event.
+            longitude (float): Longitude of the event.
 
         Returns:
             bool: True if the event exists, False otherwise.
         """
-        return self._events.search(self._query["date"] == date.timestamp())
+        # Event dates and coordinates never change once stored, so upsert_event
+        # only ever adds to the set
+        if self._event_keys is None:
+            self._event_keys = {
+                event_key(
+                    event.get("date"), event.get("latitude"), event.get("longitude")
+                )
+                for event in self._events.all()
+            }
+        return event_key(date.timestamp(), latitude, longitude) in self._event_keys
 
     def upsert_event(self, event: dict, path: str = None):
         """
@@ -188,7 +267,27 @@ class ProjectDB(DatabaseManager):
         if path:
             event["photos"] = event.get("photos", []) + [path]
 
-        updated = self._events.upsert(event, self._query.event == event["event"])
+        # Writing by document ID spares the query pass over every event
+        event_ids = self._get_event_ids()
+        doc_id = event_ids.get(event["event"])
+        updated = doc_id is not None
+        if updated:
+            self._events.update(event, doc_ids=[doc_id])
+        else:
+            event_ids[event["event"]] = self._events.insert(event)
+        if self._event_keys is not None:
+            self._event_keys.add(
+                event_key(
+                    event.get("date"), event.get("latitude"), event.get("longitude")
+                )
+            )
+        if self._event_snapshot is not None:
+            if self._event_timeline and event["event"] not in self._event_snapshot:
+                dates, names = self._event_timeline
+                position = bisect_right(dates, event["date"])
+                dates.insert(position, event["date"])
+                names.insert(position, event["event"])
+            self._event_snapshot.setdefault(event["event"], {}).update(event)
         return updated
 
     def remove_photo_from_event(
@@ -210,9 +309,9 @@ class ProjectDB(DatabaseManager):
             if event["event"] != keep_event["event"]:
                 photos = event.get("photos", [])
                 photos.remove(photo_path)
-                self._events.update(
-                    {"photos": photos}, self._query.event == event["event"]
-                )
+                self._events.update({"photos": photos}, EVENT == event["event"])
+                if self._event_snapshot and event["event"] in self._event_snapshot:
+                    self._event_snapshot[event["event"]]["photos"] = photos
 
     def find_events_with_photo(self, photo_path: str) -> list:
         """
@@ -225,11 +324,24 @@ class ProjectDB(DatabaseManager):
             list: List of events containing the photo.
         """
         events_with_photo = []
-        for event in self._events.all():
+        for event in self._get_event_snapshot().values():
             if photo_path in event.get("photos", []):
                 events_with_photo.append(event)
         return events_with_photo
 
+    def get_photos_in_events(self) -> set:
+        """
+        Get the paths of every photo that already belongs to an event.
+
+        Returns:
+            set: Relative photo paths.
+        """
+        return {
+            photo
+            for event in self._get_event_snapshot().values()
+            for photo in event.get("photos", [])
+        }
+
     # Photos table methods
     def get_photo(self, path: str):
         """
@@ -241,7 +353,34 @@ class ProjectDB(DatabaseManager):
         Returns:
             dict: Photo data.
         """
-        return self._photos.get(self._query.path == path)
+        doc_id = self._get_photo_ids().get(path)
+        if doc_id is None:
+            return None
+        return self._photos.get(doc_id=doc_id)
+
+    def _get_photo_ids(self) -> dict:
+        """Index of photo paths to document IDs, so lookups skip the table scan."""
+        if self._photo_ids is None:
+            self._photo_ids = {}
+            for document in self._photos.all():
+                self._photo_ids.setdefault(document["path"], document.doc_id)
+        return self._photo_ids
+
+    def get_photos(self, paths: list = None):
+        """
+        Get some or all photos from the database in a single table scan.
+
+        Args:
+            paths (list): List of photo paths to get. If None, get all photos.
+
+        Returns:
+            dict: Dictionary of photos keyed by path.
+        """
+        photos = {}
+        for document in self._photos.all():
+            if not paths or document["path"] in paths:
+                photos[document["path"]] = document
+        return photos
 
     def get_photos_by_event(self, event: str):
         """
@@ -269,7 +408,41 @@ class ProjectDB(DatabaseManager):
         Returns:
             bool: True if the photo was updated, False if it was inserted.
         """
-        return self._photos.upsert(photo, self._query.path == photo["path"])
+        doc_ids = self._photos.upsert(photo, PATH == photo["path"])
+        if self._photo_ids is not None and doc_ids:
+            self._photo_ids.setdefault(photo["path"], doc_ids[0])
+        return doc_ids
+
+    def upsert_photos(self, photos: list):
+        """
+        Update or insert many photos with one update and one insert.
+
+        Args:
+            photos (list): List of photo data.
+
+        Returns:
+            list: IDs of the updated and inserted photos.
+        """
+        pending = {photo["path"]: photo for photo in photos}
+        doc_ids = [
+            document.doc_id
+            for document in self._photos.all()
+            if document["path"] in pending
+        ]
+
+        updated = set()
+
+        def apply(document):
+            document.update(pending[document["path"]])
+            updated.add(document["path"])
+
+        if doc_ids:
+            self._photos.update(apply, doc_ids=doc_ids)
+        inserted = self._photos.insert_multiple(
+            photo for path, photo in pending.items() if path not in updated
+        )
+        self._photo_ids = None
+        return doc_ids + inserted
 
     def remove_photo(self, photo: dict):
         """
@@ -278,7 +451,8 @@ class ProjectDB(DatabaseManager):
         Args:
             photo (dict): Photo data.
         """
-        self._photos.remove(self._query.path == photo["path"])
+        self._photos.remove(PATH == photo["path"])
+        self._photo_ids = None
 
     # Posts table methods
     def set_post(self, event_name, user, platform, uri):
@@ -302,7 +476,7 @@ class ProjectDB(DatabaseManager):
                 "event": event_name,
                 "where": platform,
                 "account": user,
-                "date": pendulum.now().timestamp(),
+                "date": time.time(),
                 "link": post_url,
                 "uri": uri,
             }
@@ -319,7 +493,7 @@ class ProjectDB(DatabaseManager):
         Returns:
             dict: Rankings data.
         """
-        rankings = self._rankings.search(self._query.event == event)
+        rankings = self._rankings.search(EVENT == event)
         # sort rankings by rank
         logging.debug(f"Rankings from database for {event} from DB: {rankings}")
         rankings = sorted(rankings, key=lambda x: x["rank"])
@@ -335,7 +509,7 @@ class ProjectDB(DatabaseManager):
         Returns:
             int: Rank of the photo.
         """
-        rankings = self._rankings.get(self._query.path == path)
+        rankings = self._rankings.get(PATH == path)
         logging.debug(f"Rankings from database for {path}: {rankings}")
         return rankings.get("rank", 0) if rankings else 0
 
@@ -349,4 +523,4 @@ class ProjectDB(DatabaseManager):
         Returns:
             bool: True if the rankings were updated, False if they were inserted.
         """
-        return self._rankings.upsert(rankings, self._query.path == rankings["path"])
+        return self._rankings.upsert(rankings, PATH == rankings["path"])
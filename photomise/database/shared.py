@@ -1,4 +1,7 @@
-from geopy.distance import great_circle
+import math
+from itertools import product
+
+from tinydb import Query
 
 from photomise.database.base import DatabaseManager
 from photomise.utilities.constants import SHARED_DB_PATH
@@ -6,11 +9,41 @@ from photomise.utilities.logging import setup_logging
 
 logger, console = setup_logging()
 
+# Query field paths shared by every lookup below
+EVENT = Query().event
+LATITUDE = Query().latitude
+LONGITUDE = Query().longitude
+NAME = Query().name
+
+# Lower bound on the length of one degree of latitude (110.57-111.69 km on the
+# ellipsoid, 111.19 km on great_circle's sphere). Dividing by a shorter degree
+# widens the bounding box in find_location, so it never excludes a location
+# that is actually in range; raising this value would make it unsafe
+KM_PER_DEGREE = 111.0
+
+# Mean Earth radius, the same one geopy's great_circle uses
+EARTH_RADIUS_KM = 6371.009
+
+# Locations are bucketed into cells this many degrees wide, a little over 1 km
+# of latitude, so the default 0.5 km search only touches a handful of cells
+GRID_DEGREES = 0.01
+
+# Repeat lookups are memoised on coordinates rounded to about a metre, close
+# enough that burst shots taken from the same spot share one result
+LOOKUP_DECIMALS = 5
+
+
+def grid_cell(latitude: float, longitude: float) -> tuple:
+    return math.floor(latitude / GRID_DEGREES), math.floor(longitude / GRID_DEGREES)
+
 class SharedDB(DatabaseManager):
     def __init__(self):
         super().__init__(SHARED_DB_PATH)
         self._locations = self.get_table("locations")
         self._filters = self.get_table("filters")
+        self._location_index = None
+        self._location_coords = None
+        self._location_matches = {}
 
     @property
     def projects(self):
@@ -31,7 +64,7 @@ class SharedDB(DatabaseManager):
         return items
 
     def get_filter(self, filter_name: str) -> dict:
-        filter = self._filters.get(self._query.name == filter_name)
+        filter = self._filters.get(NAME == filter_name)
         return filter
 
     def get_filters_all(self) -> dict:
@@ -46,7 +79,7 @@ class SharedDB(DatabaseManager):
                 "color": params["color"],
                 "sharpness": params["sharpness"],
             },
-            self._query.name == params["name"],
+            NAME == params["name"],
         )
 
         if updated:
@@ -63,7 +96,7 @@ class SharedDB(DatabaseManager):
                 "color": params["color"],
                 "sharpness": params["sharpness"],
             },
-            self._query.name == params["name"],
+            NAME == params["name"],
         )
 
         if updated:
@@ -72,25 +105,27 @@ class SharedDB(DatabaseManager):
             return False
 
     def get_location(self, location_name: str) -> dict:
-        return self._locations.get(self._query.name == location_name)
+        return self._locations.get(NAME == location_name)
 
     def get_location_coord(self, lat: float, lon: float) -> dict:
-        return self._locations.get(
-            (self._query.latitude == lat) & (self._query.longitude == lon)
-        )
+        return self._locations.get((LATITUDE == lat) & (LONGITUDE == lon))
 
     def upsert_location(self, params: dict) -> str:
         updated = self._locations.upsert(
             {
-                "name": params["location_name"],
+                "name": params["name"],
                 "latitude": params["latitude"],
                 "longitude": params["longitude"],
             },
-            self._query.name == params["location_name"],
+            NAME == params["name"],
         )
+        # Named locations are the lookup cache for every later photo nearby
+        self._location_index = None
+        self._location_coords = None
+        self._location_matches = {}
 
         if updated:
-            return params["location_name"]
+            return params["name"]
         else:
             return False
 
@@ -105,27 +140,96 @@ class SharedDB(DatabaseManager):
                 return filter.get("name", "None")
         return "None"
 
+    def _get_location_index(self) -> tuple:
+        """Locations bucketed by grid cell, built once and reused for every lookup."""
+        if self._location_index is None:
+            # Radians and the latitude cosine are computed once per location
+            items = [
+                (
+                    item["latitude"],
+                    item["longitude"],
+                    item["name"],
+                    math.radians(item["latitude"]),
+                    math.radians(item["longitude"]),
+                    math.cos(math.radians(item["latitude"])),
+                )
+                for item in self._locations.all()
+            ]
+            grid = {}
+            for item in items:
+                grid.setdefault(grid_cell(item[0], item[1]), []).append(item)
+            self._location_index = (items, grid)
+        return self._location_index
+
     def find_location(
         self, latitude: float, longitude: float, max_distance_km: float = 0.5
+    ):
+        key = (
+            round(latitude, LOOKUP_DECIMALS),
+            round(longitude, LOOKUP_DECIMALS),
+            max_distance_km,
+        )
+        if key not in self._location_matches:
+            self._location_matches[key] = self._find_closest_location(*key)
+        return self._location_matches[key]
+
+    def _find_closest_location(
+        self, latitude: float, longitude: float, max_distance_km: float
     ):
         closest_location = None
-        closest_distance = max_distance_km
+        # Haversine distance grows with a = sin^2(d / 2R), so candidates are
+        # ranked on a directly and asin/sqrt are never taken
+        half_angle = max_distance_km / (2 * EARTH_RADIUS_KM)
+        closest_a = math.sin(half_angle) ** 2 if half_angle < math.pi / 2 else math.inf
+
+        # Only measure the locations inside a bounding box around the point
+        items, grid = self._get_location_index()
+        delta_lat = max_distance_km / KM_PER_DEGREE
+        cos_lat = math.cos(math.radians(latitude))
+        delta_lon = delta_lat / cos_lat if cos_lat > 1e-6 else 360.0
+        if abs(longitude) + delta_lon > 180.0:
+            # The box wraps around the antimeridian or a pole
+            delta_lon = 360.0
+
+        low_lat, low_lon = grid_cell(latitude - delta_lat, longitude - delta_lon)
+        high_lat, high_lon = grid_cell(latitude + delta_lat, longitude + delta_lon)
+        lat_cells = range(low_lat, high_lat + 1)
+        lon_cells = range(low_lon, high_lon + 1)
+        if len(lat_cells) * len(lon_cells) < len(items):
+            candidates = [
+                item
+                for cell in product(lat_cells, lon_cells)
+                for item in grid.get(cell, ())
+            ]
+        else:
+            # A wide search box has more cells than there are locations
+            candidates = items
 
-        for item in self._locations.all():
-            location_coords = (item["latitude"], item["longitude"])
-            distance = great_circle((latitude, longitude), location_coords).kilometers
+        phi = math.radians(latitude)
+        lam = math.radians(longitude)
+        for item_lat, item_lon, name, item_phi, item_lam, item_cos in candidates:
+            if (
+                abs(item_lat - latitude) > delta_lat
+                or abs(item_lon - longitude) > delta_lon
+            ):
+                continue
+            a = (
+                math.sin((item_phi - phi) / 2) ** 2
+                + cos_lat * item_cos * math.sin((item_lam - lam) / 2) ** 2
+            )
 
-            if distance < closest_distance:
-                closest_location = item["name"]
-                closest_distance = distance
+            if a < closest_a:
+                closest_location = name
+                closest_a = a
 
         return closest_location
 
     def is_location(self, lat, lon):
-        result = self._locations.search(
-            (self._query.latitude == lat) & (self._query.longitude == lon)
-        )
-        return len(result) > 0
+        if self._location_coords is None:
+            self._location_coords = {
+                (item["latitude"], item["longitude"]) for item in self._locations.all()
+            }
+        return (lat, lon) in self._location_coords
 
     def upsert_event(self, event: dict):
         """
@@ -133,11 +237,9 @@ class SharedDB(DatabaseManager):
 
         event_name, relative_path, date, location, photos
         """
-        updated = self._events.upsert(
-            event, self._query.where("event") == event["event"]
-        )
+        updated = self._events.upsert(event, EVENT == event["event"])
         return updated
 
     def delete_filter(self, filter_name: str):
-        self._filters.remove(self._query.name == filter_name)
+        self._filters.remove(NAME == filter_name)
         return True
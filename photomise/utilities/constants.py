@@ -4,3 +4,5 @@ SHARED_DB_PATH = "shared.json"
 BLUESKY_SERVICE_NAME = "photomise-atprotocol-bluesky"
 APP_DIR = Path.home() / ".photomise"
 LOG_DIR = APP_DIR / "logs"
+# Formats Pillow can compress and piexif can read EXIF from
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".webp"}
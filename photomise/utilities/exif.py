@@ -1,19 +1,51 @@
+import os
+import shutil
+import struct
+import subprocess
+from functools import lru_cache
 from io import BytesIO
 
 import pendulum
 import piexif
 from PIL import Image, ImageEnhance
 
+try:
+    import pyvips
+except (ImportError, OSError):
+    # pyvips is optional and raises OSError when libvips itself is missing
+    pyvips = None
+
+# Start-of-frame markers carry the image size; C4, C8 and CC share the range
+# but are Huffman/arithmetic table markers
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+JPEGTRAN = shutil.which("jpegtran")
+
+# Sum of libjpeg's luminance quantization table at quality 50; encoders
+# scale that table for every other quality, so it can be read back from a file
+JPEG_STD_LUMINANCE_TOTAL = 3688
+
+# Counter-clockwise, matching Image.rotate()
+RIGHT_ANGLE_TRANSPOSES = {
+    90: Image.Transpose.ROTATE_90,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_270,
+}
+
+# Tag IDs read for every photo, resolved once instead of on each call
+GPS_LATITUDE = piexif.GPSIFD.GPSLatitude
+GPS_LATITUDE_REF = piexif.GPSIFD.GPSLatitudeRef
+GPS_LONGITUDE = piexif.GPSIFD.GPSLongitude
+GPS_LONGITUDE_REF = piexif.GPSIFD.GPSLongitudeRef
+DATE_TIME_ORIGINAL = piexif.ExifIFD.DateTimeOriginal
 
 def extract_exif_info(image_path: str) -> dict:
     return piexif.load(image_path)
 
 
 def convert_to_degrees(value) -> float:
-    d = value[0][0] / value[0][1]
-    m = value[1][0] / value[1][1]
-    s = value[2][0] / value[2][1]
-    return d + (m / 60.0) + (s / 3600.0)
+    (d_num, d_den), (m_num, m_den), (s_num, s_den) = value
+    return d_num / d_den + m_num / (m_den * 60.0) + s_num / (s_den * 3600.0)
 
 
 def deg_to_dms_rational(deg):
@@ -26,10 +58,10 @@ def deg_to_dms_rational(deg):
 def extract_gps(tags: dict) -> tuple:
     gps_info = tags.get("GPS", {})
 
-    gps_latitude = gps_info.get(piexif.GPSIFD.GPSLatitude)
-    gps_latitude_ref = gps_info.get(piexif.GPSIFD.GPSLatitudeRef)
-    gps_longitude = gps_info.get(piexif.GPSIFD.GPSLongitude)
-    gps_longitude_ref = gps_info.get(piexif.GPSIFD.GPSLongitudeRef)
+    gps_latitude = gps_info.get(GPS_LATITUDE)
+    gps_latitude_ref = gps_info.get(GPS_LATITUDE_REF)
+    gps_longitude = gps_info.get(GPS_LONGITUDE)
+    gps_longitude_ref = gps_info.get(GPS_LONGITUDE_REF)
 
     if gps_latitude and gps_latitude_ref and gps_longitude and gps_longitude_ref:
         lat = convert_to_degrees(gps_latitude)
@@ -53,13 +85,61 @@ def compress_image(
     color: float = 1.0,
     sharpness: float = 1.0,
     show: bool = False,
+    preview: bool = False,
 ):
+    # A decoded image can only go through PIL
+    from_file = not isinstance(image_path, Image.Image)
+    unfiltered = brightness == contrast == color == sharpness == 1.0
+    rotation = float(rotation_angle or 0)
+    # Quarter turns can be done without resampling; None for any other angle
+    right_angle = int(rotation) % 360 if rotation % 90 == 0 else None
+    # jpegtran and libvips only take a file with nothing but a quarter turn to
+    # apply; a missing quality or size is left to the PIL path to report
+    passthrough = (
+        from_file
+        and right_angle is not None
+        and unfiltered
+        and not show
+        and bool(quality)
+        and bool(max_dimension)
+    )
+
+    # jpegtran also covers an unrotated JPEG that already fits: it is copied
+    # with its metadata stripped instead of being decoded and re-encoded.
+    # It keeps the source's quantization, so it is only used when that is
+    # already at or below the quality asked for
+    if JPEGTRAN and passthrough:
+        try:
+            dimensions = _fast_jpeg_dimensions(image_path)
+        except (OSError, IndexError, struct.error):
+            dimensions = None
+        fits = dimensions and max(dimensions) <= int(max_dimension)
+        source_quality = _estimate_jpeg_quality(image_path) if fits else None
+        if source_quality is not None and source_quality <= int(quality):
+            try:
+                return rotate_jpeg_lossless(image_path, right_angle)
+            except subprocess.CalledProcessError as e:
+                print(f"Error rotating image losslessly, re-encoding: {e}")
+
+    if pyvips and passthrough:
+        try:
+            return compress_image_vips(image_path, quality, max_dimension, right_angle)
+        except pyvips.Error as e:
+            print(f"Error compressing image with libvips, using PIL: {e}")
+
     try:
-        image = Image.open(image_path)
+        if from_file:
+            image = open_image(image_path, max_dimension)
+        else:
+            # Rotation and filters must not touch the caller's copy
+            image = image_path.copy()
         img_io = BytesIO()
 
-        if rotation_angle:
-            image = image.rotate(float(rotation_angle), expand=True)
+        if right_angle:
+            # A transpose only moves pixels, rotate() would resample them
+            image = image.transpose(RIGHT_ANGLE_TRANSPOSES[right_angle])
+        elif right_angle is None:
+            image = image.rotate(rotation, expand=True)
 
         width, height = image.size
 
@@ -71,7 +151,11 @@ def compress_image(
 
             new_width = int(width * scale_factor)
             new_height = int(height * scale_factor)
-            image = image.resize((new_width, new_height), Image.LANCZOS)
+            # Previews are only looked at, so they get the cheaper filter
+            resample = Image.BILINEAR if preview else Image.LANCZOS
+            # Large non-JPEG sources are box-reduced first, the same trade-off
+            # Image.thumbnail makes by default
+            image = image.resize((new_width, new_height), resample, reducing_gap=2.0)
 
         image = enhance_image(
             image,
@@ -81,7 +165,10 @@ def compress_image(
             sharpness,
         )
 
-        image.save(img_io, format="JPEG", optimize=True, quality=quality)
+        # Skip the extra Huffman optimisation pass, Bluesky re-encodes uploads anyway
+        image.save(
+            img_io, format="JPEG", quality=quality, subsampling=2, progressive=False
+        )
         if show:
             image.show()
 
@@ -92,6 +179,54 @@ def compress_image(
         print(f"Error compressing image: {e}")
 
 
+def open_image(image_path: str, max_dimension: int = 1200) -> Image.Image:
+    """Decode an image once so it can be compressed repeatedly, e.g. for previews."""
+    image = Image.open(image_path)
+    if image.format == "JPEG":
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale while staying above
+        # max_dimension, so LANCZOS only has to finish the last step
+        image.draft("RGB", (int(max_dimension), int(max_dimension)))
+    image.load()
+    return image
+
+
+def rotate_jpeg_lossless(image_path: str, rotation_angle: int) -> BytesIO:
+    # jpegtran rotates the DCT blocks without decoding; it turns clockwise.
+    # -optimize rebuilds the Huffman tables, which shrinks the upload for free
+    # since the coefficients are already being rewritten
+    command = [JPEGTRAN]
+    if rotation_angle:
+        command += ["-rotate", str(360 - rotation_angle), "-perfect"]
+    command += ["-optimize", "-copy", "none", image_path]
+    result = subprocess.run(command, capture_output=True, check=True)
+    return BytesIO(result.stdout)
+
+
+def compress_image_vips(
+    image_path: str,
+    quality: int = 80,
+    max_dimension: int = 1200,
+    rotation_angle: int = 0,
+) -> BytesIO:
+    # thumbnail() uses shrink-on-load, so only the pixels we keep get decoded
+    image = pyvips.Image.thumbnail(
+        image_path,
+        int(max_dimension),
+        height=int(max_dimension),
+        size="down",
+        no_rotate=True,
+    )
+
+    # PIL rotates counter-clockwise, libvips rotates clockwise
+    angle = (360 - rotation_angle) % 360
+    if angle:
+        image = image.rot(f"d{angle}")
+
+    return BytesIO(
+        image.jpegsave_buffer(Q=int(quality), subsample_mode="on", strip=True)
+    )
+
+
 def enhance_image(
     image: Image.Image,
     brightness: float = 1.0,
@@ -99,46 +234,107 @@ def enhance_image(
     color: float = 1.0,
     sharpness: float = 1.0,
 ) -> Image.Image:
-
-    enhancer = ImageEnhance.Brightness(image)
-    image = enhancer.enhance(brightness)
-
-    enhancer = ImageEnhance.Contrast(image)
-    image = enhancer.enhance(contrast)
-
-    enhancer = ImageEnhance.Color(image)
-    image = enhancer.enhance(color)
-
-    enhancer = ImageEnhance.Sharpness(image)
-    image = enhancer.enhance(sharpness)
+    # Each enhancer builds a full-size reference image and blends against it,
+    # so a factor of 1.0, which gives back the input, is skipped
+    for enhancer, factor in (
+        (ImageEnhance.Brightness, brightness),
+        (ImageEnhance.Contrast, contrast),
+        (ImageEnhance.Color, color),
+        (ImageEnhance.Sharpness, sharpness),
+    ):
+        if factor != 1.0:
+            image = enhancer(image).enhance(factor)
 
     return image
 
 
 def extract_datetime(tags: dict) -> pendulum:
     exif_info = tags.get("Exif", {})
-    date_taken = exif_info.get(piexif.ExifIFD.DateTimeOriginal)
+    date_taken = exif_info.get(DATE_TIME_ORIGINAL)
 
     if date_taken:
-        date_taken_str = date_taken.decode("utf-8")
-        date_taken_formatted = date_taken_str.replace(":", "-", 2)
-        dt = pendulum.parse(date_taken_formatted)
-
-        return dt
+        return _parse_exif_datetime(date_taken)
     else:
         return None
 
 
-def get_image_aspect_ratio(image_path: str) -> tuple:
+@lru_cache(maxsize=1024)
+def _parse_exif_datetime(date_taken: bytes) -> pendulum:
+    # Bursts and sequences share timestamps, and pendulum dates are immutable.
+    # EXIF fixes the layout to "YYYY:MM:DD HH:MM:SS", so the fields are sliced
+    # straight out instead of going through pendulum's general parser
+    return pendulum.DateTime(
+        int(date_taken[0:4]),
+        int(date_taken[5:7]),
+        int(date_taken[8:10]),
+        int(date_taken[11:13]),
+        int(date_taken[14:16]),
+        int(date_taken[17:19]),
+        tzinfo=pendulum.UTC,
+    )
+
+
+def _fast_jpeg_dimensions(image) -> tuple:
+    """Read (width, height) from the JPEG frame header without touching pixel data."""
+    if isinstance(image, (str, os.PathLike)):
+        with open(image, "rb", buffering=64 * 1024) as file:
+            return _read_jpeg_dimensions(file)
+    image.seek(0)
     try:
-        exif_dict = piexif.load(image_path)
-        image_width = exif_dict["0th"][piexif.ImageIFD.ImageWidth]
-        image_height = exif_dict["0th"][piexif.ImageIFD.ImageLength]
-        return (image_width, image_height)
-    except (piexif.InvalidImageDataError, KeyError, TypeError):
-        try:
-            with Image.open(image_path) as img:
-                width, height = img.size
-                return (width, height)
-        except (OSError, IOError):
-            return None, None
+        return _read_jpeg_dimensions(image)
+    finally:
+        image.seek(0)
+
+
+def _read_jpeg_dimensions(file) -> tuple:
+    if file.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        marker = file.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        while code == 0xFF:
+            code = file.read(1)[0]
+        if code == 0x01 or 0xD0 <= code <= 0xD8:
+            continue
+        if code in (0xD9, 0xDA):
+            return None
+        (length,) = struct.unpack(">H", file.read(2))
+        if code in JPEG_SOF_MARKERS:
+            _, height, width = struct.unpack(">BHH", file.read(5))
+            return width, height
+        file.seek(length - 2, os.SEEK_CUR)
+
+
+def _estimate_jpeg_quality(image_path: str) -> int:
+    """Estimate the libjpeg quality a JPEG was saved at, or None if unknown."""
+    try:
+        # Image.open only parses the header, the tables are read from there
+        with Image.open(image_path) as image:
+            tables = getattr(image, "quantization", None)
+    except OSError:
+        return None
+    if not tables or 0 not in tables:
+        return None
+
+    scale = sum(tables[0]) * 100 / JPEG_STD_LUMINANCE_TOTAL
+    if scale <= 0:
+        return None
+    # Inverse of libjpeg's jpeg_quality_scaling()
+    if scale <= 100:
+        return round((200 - scale) / 2)
+    return round(5000 / scale)
+
+
+def get_image_aspect_ratio(image) -> tuple:
+    """Return (width, height) of an image path or an in-memory image file."""
+    try:
+        dimensions = _fast_jpeg_dimensions(image)
+        if dimensions:
+            return dimensions
+        # Image.open only parses the header, the pixels are never decoded
+        with Image.open(image) as img:
+            return img.size
+    except (OSError, IOError, IndexError, struct.error):
+        return None, None
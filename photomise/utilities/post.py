@@ -1,22 +1,25 @@
 import getpass
 
-import keyring
-from InquirerPy import inquirer
-
 from photomise.database.project import ProjectDB
 from photomise.utilities import constants
 
 
 def get_bluesky_user(pdb: ProjectDB) -> str:
-    try:
-        return pdb.get_bluesky_user()
-    except TypeError:
-        user = inquirer.text("Enter your Bluesky username").execute()
-        pdb.set_bluesky_user(user)
+    user = pdb.get_bluesky_user()
+    if user:
         return user
 
+    from InquirerPy import inquirer
+
+    user = inquirer.text("Enter your Bluesky username").execute()
+    pdb.set_bluesky_user(user)
+    return user
+
 
 def get_password_from_keyring(logger, user: str):
+    # keyring probes every installed backend on import
+    import keyring
+
     logger.debug(f"Attempting to get password for {user}...")
     password = keyring.get_password(constants.BLUESKY_SERVICE_NAME, user)
     if password:
@@ -1,9 +1,7 @@
 import os
+from datetime import datetime, timezone
 from urllib.parse import quote
 
-import pendulum
-from InquirerPy import inquirer
-
 from photomise.database.project import ProjectDB
 from photomise.database.shared import SharedDB
 from photomise.utilities.logging import setup_logging
@@ -31,8 +29,8 @@ def sanitize_text(text: str = "") -> str:
     return quote(text.strip().replace(" ", "_"))
 
 
-def item_duplicate(pdb, gdb, date_object, lat, lon):
-    return pdb.is_event(date_object) and gdb.is_location(lat, lon)
+def item_duplicate(pdb, date_object, lat, lon):
+    return pdb.is_event_at(date_object, lat, lon)
 
 
 def fix_dir(current):
@@ -78,6 +76,8 @@ def get_project_db(project_name: str, project_path: str) -> ProjectDB:
 
 
 def set_project_settings(pdb: ProjectDB) -> None:
+    from InquirerPy import inquirer
+
     settings = {}
     setting_doc = pdb.settings
 
@@ -116,22 +116,37 @@ def set_project_settings(pdb: ProjectDB) -> None:
     return settings
 
 
-def get_non_hidden_files(directory: str):
+def get_non_hidden_files(directory: str, extensions: set = None):
     found_non_hidden_files = False
-    for entry in os.scandir(directory):
-        if (
-            entry.is_file()
-            and not entry.name.startswith(".")
-            and not entry.name.startswith("~")
-        ):
-            found_non_hidden_files = True
-            yield directory, entry.name
-        elif entry.is_dir():
-            yield from get_non_hidden_files(entry.path)
+    for found in _scan_non_hidden_files(directory, extensions):
+        found_non_hidden_files = True
+        yield found
     if not found_non_hidden_files:
         yield None, None
 
 
+def _scan_non_hidden_files(directory: str, extensions: set = None):
+    # DirEntry answers is_dir/is_file from the directory listing itself,
+    # so most entries cost no extra stat call. Folders wait on a stack
+    # rather than nesting a generator per level
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.name.startswith((".", "~")):
+                    continue
+                # Symlinked folders are not followed, they can loop back on themselves
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    # Check the suffix before anything opens the file
+                    suffix = os.path.splitext(entry.name)[1].lower()
+                    if extensions and suffix not in extensions:
+                        continue
+                    yield current, entry.name
+
+
 def handle_duplicate_events(pdb: ProjectDB, events: list, photo_path: str) -> None:
     """
     Handle events that contain the same photo.
@@ -149,9 +164,10 @@ def handle_duplicate_events(pdb: ProjectDB, events: list, photo_path: str) -> No
         f"\n[yellow]Warning:[/yellow] Photo {photo_path} appears in multiple events:"
     )
     for idx, event in enumerate(events, 1):
-        console.print(
-            f"{idx}. {event['event']} ({pendulum.from_timestamp(event['date']).format('YYYY-MM-DD')})"
-        )
+        date = datetime.fromtimestamp(event["date"], tz=timezone.utc)
+        console.print(f"{idx}. {event['event']} ({date.strftime('%Y-%m-%d')})")
+
+    from InquirerPy import inquirer
 
     keep_idx = inquirer.select(
         message="Which event should keep this photo?",
@@ -1,6 +1,3 @@
-from InquirerPy import inquirer
-
-
 def min_max_check(value: float, min_val: float = 0.0, max_val: float = 2.0) -> float:
     if not value:
         return False
@@ -14,6 +11,8 @@ def min_max_check(value: float, min_val: float = 0.0, max_val: float = 2.0) -> f
 def make_min_max_prompt(
     message: str, default: float, min_val: float = 0.0, max_val: float = 2.0
 ) -> float:
+    from InquirerPy import inquirer
+
     result = inquirer.text(
         message=f"{message}",
         default=str(default),
@@ -4,6 +4,15 @@ setup(
     name="photomise",
     version="0.1.0",
     packages=find_packages(),
+    install_requires=[
+        # post builds its own httpx transport for atproto's client, so this is
+        # relied on directly rather than only through atproto
+        "httpx",
+    ],
+    extras_require={
+        # Faster database reads and writes; the stdlib json module is the fallback
+        "fast": ["orjson"],
+    },
     entry_points={
         "console_scripts": [
             "photomise=photomise.cli.main:app",